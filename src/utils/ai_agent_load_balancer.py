@@ -2,27 +2,58 @@
 
 from __future__ import annotations
 
+import asyncio
+import heapq
 import json
+import logging
+import sys
+import threading
 import time
+from collections import deque
+from collections.abc import Iterator
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 
+try:
+    import orjson
+except ImportError:  # orjson is only installed with the dev dependency group
+    orjson = None  # type: ignore[assignment]
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+_BAR_LENGTH = 20
+# Every possible usage bar, indexed by the number of filled blocks.
+_BARS = tuple("█" * i + "░" * (_BAR_LENGTH - i) for i in range(_BAR_LENGTH + 1))
+
+
+def _format_ns(timestamp_ns: int | None) -> str | None:
+    """Render a ``time.time_ns()`` value as an ISO-8601 local timestamp."""
+
+    if timestamp_ns is None:
+        return None
+    return datetime.fromtimestamp(timestamp_ns / 1e9).isoformat()
+
+
+@dataclass(slots=True)
 class Task:
     """Representation of a workload assigned to agents."""
 
     name: str
     agents: dict[str, int]
-    start_time: str
+    start_time: int
     status: str
-    end_time: str | None = None
+    end_time: int | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AIAgentLoadBalancer:
-    """Load balancer that manages agent capacity and task allocation."""
+    """Load balancer that manages agent capacity and task allocation.
+
+    Capacity totals and the set of known agent types are cached at
+    construction, so ``agent_capacity`` must not be mutated directly afterwards;
+    use :meth:`set_capacity` to change or add an agent type.
+    """
 
     agent_capacity: dict[str, int] = field(
         default_factory=lambda: {
@@ -46,53 +77,96 @@ class AIAgentLoadBalancer:
         }
     )
     agent_allocation: dict[str, int] = field(init=False)
-    task_queue: list[Task] = field(default_factory=list)
-    completed_tasks: list[Task] = field(default_factory=list)
+    task_queue: dict[str, Task] = field(default_factory=dict)
+    completed_tasks: deque[Task] = field(default_factory=deque)
+    history_limit: int = 1024
+    _total_capacity: int = field(init=False, repr=False)
+    _total_allocated: int = field(init=False, repr=False)
+    _completed_count: int = field(init=False, repr=False)
+    _agent_types: tuple[str, ...] = field(init=False, repr=False)
+    _capacity_keys: frozenset[str] = field(init=False, repr=False)
+    _lock: threading.Lock = field(init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
-        self.agent_allocation = dict.fromkeys(self.agent_capacity, 0)
+        self.agent_capacity = {
+            sys.intern(agent_type): capacity
+            for agent_type, capacity in self.agent_capacity.items()
+        }
+        self._agent_types = tuple(self.agent_capacity)
+        self._capacity_keys = frozenset(self._agent_types)
+        # Every capacity key gets an allocation entry, so per-type lookups can
+        # subscript directly; unknown agent types raise ``KeyError``.
+        self.agent_allocation = dict.fromkeys(self._agent_types, 0)
+        self._completed_count = len(self.completed_tasks)
+        self.completed_tasks = deque(self.completed_tasks, maxlen=self.history_limit)
+        self._total_capacity = sum(self.agent_capacity.values())
+        self._total_allocated = 0
+        self._lock = threading.Lock()
+
+    def set_capacity(self, agent_type: str, capacity: int) -> None:
+        """Set the capacity of ``agent_type``, registering it if it is new."""
+
+        agent_type = sys.intern(agent_type)
+        with self._lock:
+            if agent_type not in self._capacity_keys:
+                self._agent_types = (*self._agent_types, agent_type)
+                self._capacity_keys = frozenset(self._agent_types)
+                self.agent_allocation[agent_type] = 0
+            self.agent_capacity[agent_type] = capacity
+            self._total_capacity = sum(self.agent_capacity.values())
 
     def get_total_capacity(self) -> int:
         """Calculate total agent capacity."""
 
-        return sum(self.agent_capacity.values())
+        return self._total_capacity
 
     def get_available_agents(self, agent_type: str) -> int:
         """Return the available agents for ``agent_type``."""
 
-        total = self.agent_capacity.get(agent_type, 0)
-        allocated = self.agent_allocation.get(agent_type, 0)
+        total = self.agent_capacity[agent_type]
+        allocated = self.agent_allocation[agent_type]
         return max(0, total - allocated)
 
     def allocate_agent(self, agent_type: str, count: int = 1) -> bool:
-        """Allocate ``count`` agents of ``agent_type`` if available."""
-
-        available = self.get_available_agents(agent_type)
-        if available >= count:
-            self.agent_allocation[agent_type] = (
-                self.agent_allocation.get(agent_type, 0) + count
-            )
-            return True
-        print(
-            f"⚠️  Insufficient {agent_type}: need {count}, available {available}"
+        """Allocate ``count`` agents of ``agent_type`` if available.
+
+        Raises ``KeyError`` if ``agent_type`` is not part of ``agent_capacity``.
+        """
+
+        with self._lock:
+            available = self.get_available_agents(agent_type)
+            if available >= count:
+                self.agent_allocation[agent_type] += count
+                self._total_allocated += count
+                return True
+        logger.warning(
+            "⚠️  Insufficient %s: need %d, available %d", agent_type, count, available
         )
         return False
 
     def release_agent(self, agent_type: str, count: int = 1) -> None:
-        """Release ``count`` agents back to the available pool."""
+        """Release ``count`` agents back to the available pool.
 
-        self.agent_allocation[agent_type] = max(
-            0, self.agent_allocation.get(agent_type, 0) - count
-        )
+        Raises ``KeyError`` if ``agent_type`` is not part of ``agent_capacity``.
+        """
+
+        with self._lock:
+            self._release_locked(agent_type, count)
+
+    def _release_locked(self, agent_type: str, count: int) -> None:
+        """Release agents; the caller must hold ``self._lock``."""
+
+        allocated = self.agent_allocation[agent_type]
+        remaining = max(0, allocated - count)
+        self.agent_allocation[agent_type] = remaining
+        self._total_allocated -= allocated - remaining
 
     def calculate_utilization(self) -> float:
         """Return overall capacity utilization percentage."""
 
-        total_capacity = self.get_total_capacity()
-        total_allocated = sum(self.agent_allocation.values())
-        if total_capacity == 0:
+        if self._total_capacity == 0:
             return 0.0
-        return total_allocated / total_capacity * 100
+        return self._total_allocated / self._total_capacity * 100
 
     def should_scale_up(self) -> bool:
         """Determine whether auto-scaling should increase capacity."""
@@ -109,72 +183,128 @@ class AIAgentLoadBalancer:
     def auto_scale(self) -> None:
         """Perform auto-scaling adjustments based on utilization."""
 
-        if self.should_scale_up():
-            print("📈 Scaling UP: High utilization detected")
-            for agent_type in self.agent_capacity:
-                self.agent_capacity[agent_type] = int(
-                    self.agent_capacity[agent_type] * 1.5
-                )
-            print("✅ Capacity increased by 50%")
-        elif self.should_scale_down():
-            print("📉 Scaling DOWN: Low utilization detected")
-            for agent_type, capacity in self.agent_capacity.items():
-                allocated = self.agent_allocation.get(agent_type, 0)
-                self.agent_capacity[agent_type] = max(
-                    allocated + 2, int(capacity * 0.7)
-                )
-            print("✅ Capacity reduced to optimal level")
+        with self._lock:
+            if self.should_scale_up():
+                logger.info("📈 Scaling UP: High utilization detected")
+                self.agent_capacity = {
+                    agent_type: int(capacity * 1.5)
+                    for agent_type, capacity in self.agent_capacity.items()
+                }
+                self._total_capacity = sum(self.agent_capacity.values())
+                logger.info("✅ Capacity increased by 50%")
+            elif self.should_scale_down():
+                logger.info("📉 Scaling DOWN: Low utilization detected")
+                alloc = self.agent_allocation
+                self.agent_capacity = {
+                    agent_type: max(alloc[agent_type] + 2, int(capacity * 0.7))
+                    for agent_type, capacity in self.agent_capacity.items()
+                }
+                self._total_capacity = sum(self.agent_capacity.values())
+                logger.info("✅ Capacity reduced to optimal level")
 
     def assign_task(self, task_name: str, required_agents: dict[str, int]) -> bool:
-        """Assign ``task_name`` using ``required_agents`` mapping."""
+        """Assign ``task_name`` using ``required_agents`` mapping.
+
+        Raises ``KeyError`` if ``required_agents`` names an agent type that is
+        not part of ``agent_capacity``.
+        """
 
-        print(f"\n🔄 Processing task: {task_name}")
-        can_allocate = all(
-            self.get_available_agents(agent_type) >= count
+        unknown = required_agents.keys() - self._capacity_keys
+        if unknown:
+            raise KeyError(f"Unknown agent types: {sorted(unknown)}")
+        required_agents = {
+            sys.intern(agent_type): count
             for agent_type, count in required_agents.items()
-        )
-        if not can_allocate:
-            print("❌ Cannot assign task: insufficient agents")
-            return False
-
-        for agent_type, count in required_agents.items():
-            self.allocate_agent(agent_type, count)
-        task = Task(
-            name=task_name,
-            agents=required_agents,
-            start_time=datetime.now().isoformat(),
-            status="in_progress",
-        )
-        self.task_queue.append(task)
-        print("✅ Task assigned successfully")
+        }
+        with self._lock:
+            # Logged under the lock so each task's messages stay together when
+            # several callers assign concurrently.
+            logger.info("\n🔄 Processing task: %s", task_name)
+            if task_name in self.task_queue:
+                logger.warning(
+                    "❌ Cannot assign task: '%s' is already active", task_name
+                )
+                return False
+            cap = self.agent_capacity
+            alloc = self.agent_allocation
+            validated: list[tuple[str, int]] = []
+            for agent_type, count in required_agents.items():
+                if cap[agent_type] - alloc[agent_type] < count:
+                    logger.warning("❌ Cannot assign task: insufficient agents")
+                    return False
+                validated.append((agent_type, count))
+
+            for agent_type, count in validated:
+                alloc[agent_type] += count
+                self._total_allocated += count
+            self.task_queue[task_name] = Task(
+                name=task_name,
+                agents=required_agents,
+                start_time=time.time_ns(),
+                status="in_progress",
+            )
+        logger.info("✅ Task assigned successfully")
         return True
 
+    def submit_batch(self, tasks: list[tuple[str, dict[str, int]]]) -> list[str]:
+        """Assign ``tasks`` largest-first and return the names that were placed.
+
+        Tasks are ordered by total agents required (longest processing time
+        first), which packs capacity better than submission order when sizes
+        differ; ties keep submission order. Raises ``KeyError`` before anything
+        is assigned if any task names an agent type not in ``agent_capacity``.
+        """
+
+        unknown = {
+            agent_type for _, required_agents in tasks for agent_type in required_agents
+        } - self._capacity_keys
+        if unknown:
+            raise KeyError(f"Unknown agent types: {sorted(unknown)}")
+        heap = [
+            (-sum(required_agents.values()), index, task_name, required_agents)
+            for index, (task_name, required_agents) in enumerate(tasks)
+        ]
+        heapq.heapify(heap)
+        assigned: list[str] = []
+        while heap and self._total_allocated < self._total_capacity:
+            _, _, task_name, required_agents = heapq.heappop(heap)
+            if self.assign_task(task_name, required_agents):
+                assigned.append(task_name)
+        return assigned
+
     def complete_task(self, task_name: str) -> None:
         """Mark a task as complete and release its agents."""
 
-        for task in list(self.task_queue):
-            if task.name == task_name:
-                for agent_type, count in task.agents.items():
-                    self.release_agent(agent_type, count)
-                task.status = "completed"
-                task.end_time = datetime.now().isoformat()
-                self.completed_tasks.append(task)
-                self.task_queue.remove(task)
-                print(f"✅ Task '{task_name}' completed")
-                break
+        with self._lock:
+            task = self.task_queue.pop(task_name, None)
+            if task is None:
+                return
+            for agent_type, count in task.agents.items():
+                self._release_locked(agent_type, count)
+            task.status = "completed"
+            task.end_time = time.time_ns()
+            self.completed_tasks.append(task)
+            self._completed_count += 1
+        logger.info("✅ Task '%s' completed", task_name)
 
     def get_status_report(self) -> str:
         """Generate a formatted status report for current allocation."""
 
+        return "\n".join(self.iter_status_lines())
+
+    def iter_status_lines(self) -> Iterator[str]:
+        """Yield the status report lazily, one line at a time."""
+
+        now = datetime.now()
         utilization = self.calculate_utilization()
-        lines = [
+        yield from (
             "╔════════════════════════════════════════════════════════════════╗",
             "║           AI AGENT LOAD BALANCER - STATUS REPORT               ║",
             "╚════════════════════════════════════════════════════════════════╝",
             "",
             "📊 SYSTEM OVERVIEW",
             "─────────────────────────────────────────────────────────────────",
-            f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Timestamp: {now:%Y-%m-%d %H:%M:%S}",
             f"Total Capacity: {self.get_total_capacity()} agents",
             f"Utilization: {utilization:.1f}%",
             "Auto-scaling: "
@@ -186,55 +316,87 @@ class AIAgentLoadBalancer:
             f"Pending Onboarding: {self.current_workload['pending_onboarding']}",
             f"Delivery Queue: {self.current_workload['delivery_queue']}",
             f"Active Tasks: {len(self.task_queue)}",
-            f"Completed Tasks: {len(self.completed_tasks)}",
+            f"Completed Tasks: {self._completed_count}",
             "",
             "🤖 AGENT CAPACITY & ALLOCATION",
             "─────────────────────────────────────────────────────────────────",
-        ]
-
-        for agent_type, capacity in self.agent_capacity.items():
-            allocated = self.agent_allocation.get(agent_type, 0)
-            available = capacity - allocated
-            usage_pct = (allocated / capacity * 100) if capacity else 0.0
-            bar_length = 20
-            filled = int(bar_length * usage_pct / 100)
-            bar = "█" * filled + "░" * (bar_length - filled)
-            lines.append(f"  {agent_type:.<25} [{bar}] {usage_pct:>5.1f}%")
-            lines.append(
-                f"  {'':.<25} {allocated}/{capacity} allocated, {available} available"
-            )
-            lines.append("")
-
-        lines.append(
-            "  ╚════════════════════════════════════════════════════════════════╝"
         )
-        return "\n".join(lines)
+        capacity = self.agent_capacity
+        for agent_type in self._agent_types:
+            yield from self._agent_row_lines(agent_type, capacity[agent_type])
+        yield "  ╚════════════════════════════════════════════════════════════════╝"
+
+    def _agent_row_lines(self, agent_type: str, capacity: int) -> tuple[str, str, str]:
+        """Render the usage bar, counts and spacer lines for one agent type."""
+
+        allocated = self.agent_allocation[agent_type]
+        available = capacity - allocated
+        usage_pct = (allocated / capacity * 100) if capacity else 0.0
+        bar = _BARS[min(int(_BAR_LENGTH * usage_pct / 100), _BAR_LENGTH)]
+        return (
+            f"  {agent_type:.<25} [{bar}] {usage_pct:>5.1f}%",
+            f"  {'':.<25} {allocated}/{capacity} allocated, {available} available",
+            "",
+        )
 
     def export_metrics(self, filename: str = "agent_metrics.json") -> None:
         """Export current metrics to ``filename`` in JSON format."""
 
+        now = datetime.now()
+        # Snapshot shared state under the lock; building and encoding the
+        # document happens outside it.
+        with self._lock:
+            capacity = dict(self.agent_capacity)
+            allocation = dict(self.agent_allocation)
+            utilization = self.calculate_utilization()
+            active_tasks = len(self.task_queue)
+            completed_count = self._completed_count
+            history = list(self.completed_tasks)
         metrics = {
-            "timestamp": datetime.now().isoformat(),
-            "capacity": self.agent_capacity,
-            "allocation": self.agent_allocation,
+            "timestamp": now.isoformat(),
+            "capacity": capacity,
+            "allocation": allocation,
             "workload": self.current_workload,
-            "utilization": self.calculate_utilization(),
-            "active_tasks": len(self.task_queue),
-            "completed_tasks": len(self.completed_tasks),
-            "task_history": [task.__dict__ for task in self.completed_tasks],
+            "utilization": utilization,
+            "active_tasks": active_tasks,
+            "completed_tasks": completed_count,
+            "task_history": [
+                {
+                    "name": task.name,
+                    "agents": task.agents,
+                    "start_time": _format_ns(task.start_time),
+                    "status": task.status,
+                    "end_time": _format_ns(task.end_time),
+                }
+                for task in history
+            ],
         }
-        with open(filename, "w", encoding="utf-8") as handle:
-            json.dump(metrics, handle, indent=2)
-        print(f"📁 Metrics exported to {filename}")
+        if orjson is not None:
+            with open(filename, "wb") as handle:
+                handle.write(orjson.dumps(metrics, option=orjson.OPT_INDENT_2))
+        else:
+            with open(filename, "w", encoding="utf-8") as handle:
+                json.dump(metrics, handle, indent=2)
+        logger.info("📁 Metrics exported to %s", filename)
+
+
+@dataclass(slots=True)
+class _LazyReport:
+    """Defer rendering a status report until a log record is actually emitted."""
 
+    balancer: AIAgentLoadBalancer
 
-def demo_simulation() -> None:
+    def __str__(self) -> str:
+        return self.balancer.get_status_report()
+
+
+async def demo_simulation() -> None:
     """Run a demonstration of the load balancer system."""
 
-    print("🚀 Starting AI Agent Load Balancer Demo\n")
+    logger.info("🚀 Starting AI Agent Load Balancer Demo\n")
     balancer = AIAgentLoadBalancer()
 
-    print(balancer.get_status_report())
+    logger.info("%s", _LazyReport(balancer))
 
     tasks = [
         (
@@ -255,25 +417,29 @@ def demo_simulation() -> None:
         ),
     ]
 
-    for task_name, required_agents in tasks:
-        balancer.assign_task(task_name, required_agents)
-        time.sleep(0.5)
+    await asyncio.gather(
+        *(
+            asyncio.to_thread(balancer.assign_task, task_name, required_agents)
+            for task_name, required_agents in tasks
+        )
+    )
 
-    print("\n" + "=" * 70)
-    print(balancer.get_status_report())
+    logger.info("\n%s", "=" * 70)
+    logger.info("%s", _LazyReport(balancer))
 
     balancer.auto_scale()
 
-    print("\n" + "=" * 70)
-    print("\n🏁 Completing tasks...\n")
+    logger.info("\n%s", "=" * 70)
+    logger.info("\n🏁 Completing tasks...\n")
     balancer.complete_task("Client Onboarding - TechCorp")
     balancer.complete_task("Research Project - AI Trends")
 
-    print("\n" + "=" * 70)
-    print(balancer.get_status_report())
+    logger.info("\n%s", "=" * 70)
+    logger.info("%s", _LazyReport(balancer))
 
     balancer.export_metrics()
 
 
 if __name__ == "__main__":
-    demo_simulation()
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    asyncio.run(demo_simulation())
@@ -0,0 +1,324 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the AI agent load balancer."""
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from src.utils.ai_agent_load_balancer import AIAgentLoadBalancer, _LazyReport, logger
+
+
+@pytest.fixture
+def balancer() -> AIAgentLoadBalancer:
+    """Balancer with a small, fixed capacity map"""
+    return AIAgentLoadBalancer(agent_capacity={"qa_agents": 5, "dev_agents": 4})
+
+
+def test_assign_task_rejects_unknown_agent_type(
+    balancer: AIAgentLoadBalancer,
+) -> None:
+    """Test that assign_task raises KeyError without allocating anything"""
+    with pytest.raises(KeyError, match="bogus"):
+        balancer.assign_task("task", {"qa_agents": 1, "bogus": 1})
+
+    assert balancer.task_queue == {}
+    assert balancer.calculate_utilization() == 0.0
+
+
+def test_submit_batch_assigns_largest_first(balancer: AIAgentLoadBalancer) -> None:
+    """Test that larger tasks are placed before smaller ones"""
+    assigned = balancer.submit_batch(
+        [
+            ("small", {"qa_agents": 1}),
+            ("large", {"qa_agents": 4}),
+            ("medium", {"qa_agents": 2}),
+            ("tiny", {"qa_agents": 1}),
+        ]
+    )
+
+    assert assigned == ["large", "small"]
+    assert balancer.agent_allocation["qa_agents"] == 5
+
+
+def test_submit_batch_rejects_unknown_type_before_assigning(
+    balancer: AIAgentLoadBalancer,
+) -> None:
+    """Test that an unknown agent type anywhere in the batch assigns nothing"""
+    with pytest.raises(KeyError, match="bogus"):
+        balancer.submit_batch([("a", {"qa_agents": 1}), ("b", {"bogus": 1})])
+
+    assert balancer.task_queue == {}
+    assert balancer.agent_allocation == {"qa_agents": 0, "dev_agents": 0}
+
+
+@pytest.mark.parametrize("method", ["allocate_agent", "release_agent"])
+def test_agent_methods_reject_unknown_agent_type(
+    balancer: AIAgentLoadBalancer, method: str
+) -> None:
+    """Test that per-type allocation methods raise KeyError for unknown types"""
+    with pytest.raises(KeyError):
+        getattr(balancer, method)("bogus")
+
+
+def test_assign_task_rejects_duplicate_active_name(
+    balancer: AIAgentLoadBalancer,
+) -> None:
+    """Test that a second task with an active name is refused and leaks nothing"""
+    assert balancer.assign_task("task", {"qa_agents": 2})
+    assert not balancer.assign_task("task", {"qa_agents": 2})
+
+    balancer.complete_task("task")
+    balancer.complete_task("task")
+
+    assert balancer.agent_allocation["qa_agents"] == 0
+    assert balancer.calculate_utilization() == 0.0
+
+
+def test_status_report_handles_capacity_below_allocation(
+    balancer: AIAgentLoadBalancer,
+) -> None:
+    """Test that an overcommitted agent type still renders"""
+    balancer.assign_task("task", {"qa_agents": 5})
+    balancer.set_capacity("qa_agents", 2)
+
+    assert balancer.get_available_agents("qa_agents") == 0
+    assert "250.0%" in balancer.get_status_report()
+
+
+def test_set_capacity_refreshes_cached_totals(balancer: AIAgentLoadBalancer) -> None:
+    """Test that capacity changes and new agent types update the cached totals"""
+    balancer.set_capacity("qa_agents", 2)
+    balancer.set_capacity("ops_agents", 4)
+
+    assert balancer.get_total_capacity() == 10
+    assert balancer.assign_task("task", {"ops_agents": 4})
+    assert balancer.calculate_utilization() == 40.0
+
+
+def test_history_limit_bounds_history_but_not_count() -> None:
+    """Test that history is capped while the completed count keeps growing"""
+    balancer = AIAgentLoadBalancer(agent_capacity={"qa_agents": 1}, history_limit=2)
+    for i in range(5):
+        balancer.assign_task(f"task-{i}", {"qa_agents": 1})
+        balancer.complete_task(f"task-{i}")
+
+    assert [task.name for task in balancer.completed_tasks] == ["task-3", "task-4"]
+    assert "Completed Tasks: 5" in balancer.get_status_report()
+
+
+class _RendezvousDict(dict):
+    """Dict whose reads wait for another thread to read too.
+
+    Without the balancer's lock, two ``assign_task`` callers both pass the
+    availability check before either commits. With the lock, the second caller
+    never reaches the read, so the wait times out and the first proceeds alone.
+    """
+
+    def __init__(self, data: dict[str, int], barrier: threading.Barrier) -> None:
+        super().__init__(data)
+        self.barrier = barrier
+
+    def __getitem__(self, key: str) -> int:
+        try:
+            self.barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+        return super().__getitem__(key)
+
+
+def test_assign_task_check_and_commit_is_atomic() -> None:
+    """Test that two callers racing for the last agent cannot both get it"""
+    balancer = AIAgentLoadBalancer(agent_capacity={"qa_agents": 1})
+    balancer.agent_allocation = _RendezvousDict(
+        balancer.agent_allocation, threading.Barrier(2, timeout=0.2)
+    )
+    results: list[bool] = []
+
+    def worker(worker_id: int) -> None:
+        results.append(balancer.assign_task(f"task-{worker_id}", {"qa_agents": 1}))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [False, True]
+    assert dict.__getitem__(balancer.agent_allocation, "qa_agents") == 1
+    assert len(balancer.task_queue) == 1
+
+
+class _BlockingHistoryEntry:
+    """History entry that pauses the exporter while it is being serialized"""
+
+    def __init__(self) -> None:
+        self.agents: dict[str, int] = {}
+        self.start_time = 0
+        self.status = "completed"
+        self.end_time = 0
+        self.reading = threading.Event()
+        self.resume = threading.Event()
+
+    @property
+    def name(self) -> str:
+        self.reading.set()
+        self.resume.wait(timeout=1)
+        return "blocking"
+
+
+def test_export_metrics_tolerates_concurrent_completion(tmp_path: Path) -> None:
+    """Test that completing a task mid-export does not break the export"""
+    entry = _BlockingHistoryEntry()
+    balancer = AIAgentLoadBalancer(
+        agent_capacity={"qa_agents": 1},
+        completed_tasks=[entry],  # type: ignore[list-item]
+    )
+    filename = tmp_path / "metrics.json"
+    errors: list[BaseException] = []
+
+    def export() -> None:
+        try:
+            balancer.export_metrics(str(filename))
+        except BaseException as exc:
+            errors.append(exc)
+
+    exporter = threading.Thread(target=export)
+    exporter.start()
+    assert entry.reading.wait(timeout=1)
+    balancer.assign_task("task", {"qa_agents": 1})
+    balancer.complete_task("task")
+    entry.resume.set()
+    exporter.join()
+
+    assert errors == []
+    assert json.loads(filename.read_text(encoding="utf-8"))["completed_tasks"] == 1
+
+
+def _export(balancer: AIAgentLoadBalancer, path: Path) -> dict:
+    """Export metrics to ``path`` and load the resulting document"""
+    balancer.export_metrics(str(path))
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+@pytest.fixture
+def exported_balancer(balancer: AIAgentLoadBalancer) -> AIAgentLoadBalancer:
+    """Balancer with one completed and one active task"""
+    balancer.assign_task("done", {"qa_agents": 2})
+    balancer.assign_task("running", {"dev_agents": 1})
+    balancer.complete_task("done")
+    return balancer
+
+
+def test_export_metrics_json_shape(
+    exported_balancer: AIAgentLoadBalancer, tmp_path: Path
+) -> None:
+    """Test the exported metrics document and its task history entries"""
+    metrics = _export(exported_balancer, tmp_path / "metrics.json")
+
+    assert list(metrics) == [
+        "timestamp",
+        "capacity",
+        "allocation",
+        "workload",
+        "utilization",
+        "active_tasks",
+        "completed_tasks",
+        "task_history",
+    ]
+    assert metrics["allocation"] == {"qa_agents": 0, "dev_agents": 1}
+    assert metrics["active_tasks"] == 1
+    assert metrics["completed_tasks"] == 1
+    (entry,) = metrics["task_history"]
+    assert list(entry) == ["name", "agents", "start_time", "status", "end_time"]
+    assert entry["name"] == "done"
+    assert entry["agents"] == {"qa_agents": 2}
+    assert entry["status"] == "completed"
+
+
+def test_export_metrics_formats_time_ns_timestamps(
+    balancer: AIAgentLoadBalancer, tmp_path: Path
+) -> None:
+    """Test that integer task timestamps are exported as ISO-8601 strings"""
+    before = time.time_ns()
+    balancer.assign_task("done", {"qa_agents": 1})
+    balancer.complete_task("done")
+    after = time.time_ns()
+    (task,) = balancer.completed_tasks
+    assert before <= task.start_time <= task.end_time <= after
+
+    (entry,) = _export(balancer, tmp_path / "metrics.json")["task_history"]
+
+    start = datetime.fromisoformat(entry["start_time"])
+    end = datetime.fromisoformat(entry["end_time"])
+    assert start == datetime.fromtimestamp(task.start_time / 1e9)
+    assert start <= end
+
+
+def test_export_metrics_stdlib_json_fallback(
+    exported_balancer: AIAgentLoadBalancer,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that the stdlib json fallback writes the same document as orjson"""
+    pytest.importorskip("orjson")
+    with_orjson = _export(exported_balancer, tmp_path / "orjson.json")
+    monkeypatch.setattr("src.utils.ai_agent_load_balancer.orjson", None)
+    with_json = _export(exported_balancer, tmp_path / "json.json")
+
+    with_orjson.pop("timestamp")
+    with_json.pop("timestamp")
+    assert with_json == with_orjson
+    assert (tmp_path / "json.json").read_text(encoding="utf-8").startswith('{\n  "')
+
+
+def test_iter_status_lines_yields_single_lines(balancer: AIAgentLoadBalancer) -> None:
+    """Test that every yielded item is one line, including the agent rows"""
+    balancer.assign_task("task", {"qa_agents": 5})
+    lines = list(balancer.iter_status_lines())
+
+    assert not [line for line in lines if "\n" in line]
+    assert "  qa_agents................ [████████████████████] 100.0%" in lines
+    assert "  ......................... 5/5 allocated, 0 available" in lines
+
+
+@pytest.mark.parametrize(
+    ("level", "rendered"), [(logging.INFO, True), (logging.WARNING, False)]
+)
+def test_lazy_report_renders_only_when_logged(
+    balancer: AIAgentLoadBalancer,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    level: int,
+    rendered: bool,
+) -> None:
+    """Test that a filtered-out report is never formatted"""
+    calls: list[None] = []
+
+    def fake_report(self: AIAgentLoadBalancer) -> str:
+        calls.append(None)
+        return "report"
+
+    monkeypatch.setattr(AIAgentLoadBalancer, "get_status_report", fake_report)
+    caplog.set_level(level, logger=logger.name)
+
+    logger.info("%s", _LazyReport(balancer))
+
+    assert bool(calls) is rendered